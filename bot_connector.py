@@ -1,6 +1,5 @@
 import queue
 import threading
-from story_bot import run_bot
 
 class BotConnector:
     def __init__(self, token):
@@ -10,18 +9,34 @@ class BotConnector:
     
     def start(self):
         self.bot_thread = threading.Thread(
-            target=run_bot,
-            args=(self.token, self.queue),
+            target=self._run_bot,
             daemon=True
         )
         self.bot_thread.start()
+
+    def _run_bot(self):
+        # Imported on the bot thread so loading discord, Firebase and Gemini doesn't block the caller
+        from story_bot import run_bot
+        run_bot(self.token, self.queue)
     
     def stop(self):
         # Implement clean shutdown if needed
         pass
     
-    def get_update(self):
+    def get_update(self, timeout=None):
+        # With a timeout, wait for the next update instead of making the caller poll on a timer
+        try:
+            if timeout is None:
+                return self.queue.get_nowait()
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def drain_updates(self):
+        """Return every queued update at once, oldest first"""
+        updates = []
         try:
-            return self.queue.get_nowait()
+            while True:
+                updates.append(self.queue.get_nowait())
         except queue.Empty:
-            return None
\ No newline at end of file
+            return updates
\ No newline at end of file
@@ -1,5 +1,6 @@
 import firebase_admin
 from firebase_admin import credentials, firestore
+from google.api_core.exceptions import NotFound
 from datetime import datetime, timedelta
 import json
 import logging
@@ -10,6 +11,9 @@ from dotenv import load_dotenv
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('firebase_db')
 
+# Maximum number of writes Firestore accepts in one batch
+FIRESTORE_BATCH_LIMIT = 500
+
 class FirebaseDatabase:
     def __init__(self):
         load_dotenv()
@@ -29,11 +33,18 @@ class FirebaseDatabase:
         except Exception as e:
             logger.error(f"Error initializing Firestore: {e}")
             raise e
+
+        # Collection references are reused by every call instead of being rebuilt each time
+        self.stories_ref = self.db.collection('stories')
+        self.contributions_ref = self.db.collection('contributions')
+        self.settings_ref = self.db.collection('settings')
+        self.designated_channels_ref = self.db.collection('designated_channels')
+        self.command_usage_ref = self.db.collection('command_usage')
     
     # Story operations
     def create_story(self, channel_id, title, opening_text, guild_id):
         """Create a new story and return its ID"""
-        story_ref = self.db.collection('stories').document()
+        story_ref = self.stories_ref.document()
         story_id = story_ref.id
         
         story_data = {
@@ -43,6 +54,7 @@ class FirebaseDatabase:
             'opening_text': opening_text,
             'final_text': opening_text,
             'started_at': datetime.now(),
+            'last_activity': datetime.now(),
             'ended_at': None,
             'doc_url': None,
             'contribution_count': 1  # Start with 1 for the opening
@@ -51,30 +63,43 @@ class FirebaseDatabase:
         story_ref.set(story_data)
         return story_id
     
-    def get_active_stories(self):
-        """Get all active stories (not ended)"""
-        stories_ref = self.db.collection('stories').where('ended_at', '==', None).stream()
-        return {doc.id: doc.to_dict() for doc in stories_ref}
+    def get_active_stories(self, since=None):
+        """Get all active stories (not ended), optionally only those with activity after `since`"""
+        query = self.stories_ref.where('ended_at', '==', None)
+        if since is not None:
+            query = query.where('last_activity', '>', since)
+        return {doc.id: doc.to_dict() for doc in query.stream()}
+    
+    def get_active_story_for_channel(self, channel_id):
+        """Get the (story_id, story data) of the active story in a channel, or None"""
+        stories = self.stories_ref\
+                      .where('channel_id', '==', str(channel_id))\
+                      .where('ended_at', '==', None)\
+                      .limit(1)\
+                      .stream()
+        for doc in stories:
+            return doc.id, doc.to_dict()
+        return None
     
     def get_story(self, story_id):
         """Get a story by ID"""
-        return self.db.collection('stories').document(story_id).get().to_dict()
+        return self.stories_ref.document(story_id).get().to_dict()
     
     def update_story(self, story_id, data):
         """Update story data"""
-        self.db.collection('stories').document(story_id).update(data)
+        self.stories_ref.document(story_id).update(data)
     
     def end_story(self, story_id, final_text):
         """Mark a story as ended"""
-        self.db.collection('stories').document(story_id).update({
+        self.stories_ref.document(story_id).update({
             'final_text': final_text,
             'ended_at': datetime.now()
         })
     
     # Contribution operations
-    def add_contribution(self, story_id, user_id, username, display_name, content):
-        """Add a contribution to a story"""
-        contrib_ref = self.db.collection('contributions').document()
+    def add_contribution(self, story_id, user_id, username, display_name, content, story_updates=None):
+        """Add a contribution to a story, applying any story_updates in the same write"""
+        contrib_ref = self.contributions_ref.document()
         contrib_id = contrib_ref.id
         
         contrib_data = {
@@ -86,18 +111,30 @@ class FirebaseDatabase:
             'timestamp': datetime.now()
         }
         
-        contrib_ref.set(contrib_data)
+        if story_updates:
+            # One atomic batch commit instead of two separate writes
+            batch = self.db.batch()
+            batch.set(contrib_ref, contrib_data)
+            batch.update(self.stories_ref.document(story_id), story_updates)
+            batch.commit()
+        else:
+            contrib_ref.set(contrib_data)
         return contrib_id
     
     def get_contributions(self, story_id):
         """Get all contributions for a story"""
-        contributions = self.db.collection('contributions').where('story_id', '==', story_id).stream()
+        contributions = self.contributions_ref.where('story_id', '==', story_id).stream()
+        return {doc.id: doc.to_dict() for doc in contributions}
+    
+    def get_contributions_bulk(self, story_ids):
+        """Get all contributions for several stories (at most 30) in one query"""
+        contributions = self.contributions_ref.where('story_id', 'in', story_ids).stream()
         return {doc.id: doc.to_dict() for doc in contributions}
     
     def get_recent_stories(self, channel_id, limit=5):
         """Get recent stories for a channel"""
         try:
-            stories = self.db.collection('stories')\
+            stories = self.stories_ref\
                           .where('channel_id', '==', str(channel_id))\
                           .order_by('started_at', direction=firestore.Query.DESCENDING)\
                           .limit(limit)\
@@ -107,7 +144,7 @@ class FirebaseDatabase:
             logger.error(f"Error getting recent stories: {e}")
             # Fallback to unordered query if index doesn't exist
             try:
-                stories = self.db.collection('stories')\
+                stories = self.stories_ref\
                               .where('channel_id', '==', str(channel_id))\
                               .limit(limit)\
                               .stream()
@@ -119,7 +156,7 @@ class FirebaseDatabase:
     # Designated channel operations
     def get_designated_channels(self):
         """Get all designated channels"""
-        channels_ref = self.db.collection('designated_channels').stream()
+        channels_ref = self.designated_channels_ref.stream()
         channels = {}
         for doc in channels_ref:
             data = doc.to_dict()
@@ -128,29 +165,36 @@ class FirebaseDatabase:
 
     def set_designated_channel(self, guild_id, channel_id):
         """Set a designated channel for a guild"""
-        self.db.collection('designated_channels').document(guild_id).set({
+        self.designated_channels_ref.document(guild_id).set({
             'channel_id': channel_id,
             'updated_at': datetime.now()
         })
 
     def remove_designated_channel(self, guild_id):
         """Remove a designated channel for a guild"""
-        self.db.collection('designated_channels').document(guild_id).delete()
+        self.designated_channels_ref.document(guild_id).delete()
 
     def get_designated_channel(self, guild_id):
         """Get the designated channel for a guild"""
-        doc = self.db.collection('designated_channels').document(guild_id).get()
+        doc = self.designated_channels_ref.document(guild_id).get()
         if doc.exists:
             return doc.to_dict().get('channel_id')
         return None
 
     def get_guild_settings(self, guild_id):
         """Get settings for a specific guild"""
-        doc = self.db.collection('settings').document(guild_id).get()
+        doc = self.settings_ref.document(guild_id).get()
         if doc.exists:
             return doc.to_dict()
         return self.get_default_settings()
 
+    def find_guild_settings(self, guild_id):
+        """Get stored settings for a guild, or None if it has none yet"""
+        doc = self.settings_ref.document(guild_id).get()
+        if doc.exists:
+            return doc.to_dict()
+        return None
+
     def get_default_settings(self):
         """Return default settings for a guild"""
         return {
@@ -171,13 +215,22 @@ class FirebaseDatabase:
 
     def update_guild_settings(self, guild_id, settings):
         """Update settings for a guild"""
-        self.db.collection('settings').document(guild_id).set(
+        self.settings_ref.document(guild_id).set(
             settings, merge=True
         )
 
+    def update_guild_setting_fields(self, guild_id, fields):
+        """Update only the given settings fields for a guild"""
+        doc_ref = self.settings_ref.document(guild_id)
+        try:
+            doc_ref.update(fields)
+        except NotFound:
+            # update() requires an existing document, so create it for new guilds
+            doc_ref.set(fields, merge=True)
+
     def get_all_guild_settings(self):
         """Get settings for all guilds"""
-        settings_ref = self.db.collection('settings').stream()
+        settings_ref = self.settings_ref.stream()
         return {doc.id: doc.to_dict() for doc in settings_ref}
 
     def is_premium_guild(self, guild_id):
@@ -189,7 +242,7 @@ class FirebaseDatabase:
     def get_command_usage(self, guild_id, command_name, period="daily"):
         """Get usage count for a specific command in a guild"""
         today = datetime.now().strftime("%Y-%m-%d")
-        doc = self.db.collection('command_usage').document(f"{guild_id}_{command_name}_{today}").get()
+        doc = self.command_usage_ref.document(f"{guild_id}_{command_name}_{today}").get()
         if doc.exists:
             return doc.to_dict().get('count', 0)
         return 0
@@ -197,7 +250,7 @@ class FirebaseDatabase:
     def increment_command_usage(self, guild_id, command_name):
         """Increment usage count for a specific command in a guild"""
         today = datetime.now().strftime("%Y-%m-%d")
-        doc_ref = self.db.collection('command_usage').document(f"{guild_id}_{command_name}_{today}")
+        doc_ref = self.command_usage_ref.document(f"{guild_id}_{command_name}_{today}")
         
         # Use transactions to safely increment the counter
         @firestore.transactional
@@ -217,7 +270,7 @@ class FirebaseDatabase:
 
     def get_story_count(self, guild_id):
         """Get count of stored stories for a guild"""
-        stories = self.db.collection('stories')\
+        stories = self.stories_ref\
                     .where('guild_id', '==', str(guild_id))\
                     .stream()
         return len(list(stories))
@@ -227,21 +280,28 @@ class FirebaseDatabase:
         cutoff_date = datetime.now() - timedelta(days=days_to_keep)
         
         # Get stories older than cutoff date
-        old_stories = self.db.collection('stories')\
+        old_stories = self.stories_ref\
                         .where('guild_id', '==', str(guild_id))\
                         .where('ended_at', '<', cutoff_date)\
                         .stream()
         
-        # Delete each story and its contributions
+        # Delete each story and its contributions in batched writes instead of one round trip per document
+        batch = self.db.batch()
+        pending = 0
         for story in old_stories:
             story_id = story.id
-            # Delete contributions
-            contributions = self.db.collection('contributions')\
+            contributions = self.contributions_ref\
                             .where('story_id', '==', story_id)\
+                            .select([])\
                             .stream()
-            for contrib in contributions:
-                contrib.reference.delete()
-            # Delete story
-            story.reference.delete()
+            for ref in [contrib.reference for contrib in contributions] + [story.reference]:
+                batch.delete(ref)
+                pending += 1
+                if pending == FIRESTORE_BATCH_LIMIT:
+                    batch.commit()
+                    batch = self.db.batch()
+                    pending = 0
+        if pending:
+            batch.commit()
 
 
@@ -247,8 +247,7 @@ class NarratorGemini:
         
     def clear_rogue_conversation(self, guild_id: str):
         """Clear the conversation history for a guild when rogue mode ends"""
-        if guild_id in self.rogue_conversations:
-            del self.rogue_conversations[guild_id]
+        self.rogue_conversations.pop(guild_id, None)
 
     @retry(tries=3, delay=2, backoff=2)
     async def generate_rogue_filler(self) -> str:
@@ -4,18 +4,23 @@ from discord import app_commands, SelectOption
 from discord.ui import Select, View
 from discord.ext import commands
 import asyncio
-from datetime import datetime
-import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+import copy
+from collections import deque
+import hashlib
+import heapq
+from datetime import datetime, timedelta
 from dataclasses import dataclass
-from typing import Optional, List
+from types import MappingProxyType
+from typing import Deque, Optional, List
 import json
 import logging
 import os
+import time
 from dotenv import load_dotenv
 
 # Import custom modules
 from narrator_gemini import NarratorGemini
-from google_docs_exporter import GoogleDocsExporter
 from firebase_db import FirebaseDatabase
 import webserver
 
@@ -25,7 +30,67 @@ load_dotenv() #? move to init?
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('story_bot')
 
-@dataclass
+# Maximum number of values Firestore accepts in an 'in' filter
+FIRESTORE_IN_QUERY_LIMIT = 30
+
+# How long to collect a burst of rogue channel messages before replying, and how many to bundle
+ROGUE_BATCH_WINDOW = 0.5
+ROGUE_BATCH_SIZE = 10
+
+# Number of new chunks after which a story's rolling summary is regenerated
+SUMMARY_REFRESH_INTERVAL = 20
+
+# Threads for blocking Firestore calls run with asyncio.to_thread; each call is network-bound
+FIRESTORE_WORKERS = 16
+
+# Number of recent contributions kept in memory per active story; Firestore holds the full history
+RECENT_CONTRIBUTIONS_KEPT = 16
+
+# Hash of the last command tree synced globally, so unchanged commands skip the sync
+COMMAND_HASH_FILE = ".command_hash"
+
+# All settings a guild can have, with descriptions
+_AVAILABLE_SETTINGS = MappingProxyType({
+    "max_contribution_length": {
+        "description": "Maximum number of characters allowed in a contribution",
+        "type": "integer",
+        "min": 50,
+        "max": 1000,
+        "default": 350
+    },
+    "rate_limit": {
+        "description": "Minimum time (in seconds) between contributions from the same user",
+        "type": "integer",
+        "min": 1,
+        "max": 3600,
+        "default": 60
+    },
+    "deny_request_percentage": {
+        "description": "Chance (0-100%) that the bot will randomly deny a contribution",
+        "type": "float",
+        "min": 0,
+        "max": 100,
+        "default": 5
+    },
+    "designated_channel": {
+        "description": "Channel ID where the bot is allowed to operate",
+        "type": "string",
+        "default": None
+    },
+    "is_rogue": {
+        "description": "Whether the bot is in rogue mode",
+        "type": "boolean",
+        "default": False
+    },
+    "premium": {
+        "description": "Whether the guild has premium status",
+        "type": "boolean",
+        "default": False
+    }
+})
+
+# slots=True drops the per-instance __dict__; popular stories keep thousands of these in memory
+@dataclass(slots=True)
 class StoryContribution:
     user_id: str
     username: str
@@ -33,16 +98,110 @@ class StoryContribution:
     content: str
     timestamp: datetime
 
-@dataclass
+    @staticmethod
+    def from_doc(contrib_data: dict) -> "StoryContribution":
+        """Build a contribution from a Firestore contribution document"""
+        # Firestore already returns datetimes; only convert other timestamp types
+        timestamp = contrib_data.get('timestamp')
+        if timestamp is not None and not isinstance(timestamp, datetime):
+            timestamp = datetime.fromtimestamp(timestamp.timestamp())
+        return StoryContribution(
+            contrib_data.get('user_id'),
+            contrib_data.get('username'),
+            contrib_data.get('display_name'),
+            contrib_data.get('content'),
+            timestamp
+        )
+
+@dataclass(slots=True)
 class ActiveStory:
+    story_id: str
     channel_id: str
     title: str
     opening_text: str
-    current_text: str
-    contributions: List[StoryContribution]
+    current_chunks: List[str]  # opening text followed by each contribution
+    contributions: Deque[StoryContribution]  # only the most recent contributions
     started_at: datetime
+    rolling_summary: str = ""  # summary of current_chunks[:summary_cursor]
+    summary_cursor: int = 0
+
+    def __post_init__(self):
+        self.contributions = deque(self.contributions, maxlen=RECENT_CONTRIBUTIONS_KEPT)
+
+    @property
+    def current_text(self) -> str:
+        return "\n\n".join(self.current_chunks)
+
+class SettingsCache(dict):
+    """In-memory guild settings (guild_id: settings) that batches writes to Firestore"""
+
+    def __init__(self, db, flush_delay=3.0, max_retry_delay=300.0):
+        super().__init__()
+        self.db = db
+        self.flush_delay = flush_delay
+        self.max_retry_delay = max_retry_delay
+        self.dirty_fields = {}  # guild_id: names of settings not yet saved
+        self._flush_tasks = {}  # guild_id: pending flush task
+
+    def mark_dirty(self, guild_id, *fields):
+        """Queue settings to be saved, coalescing changes made within flush_delay seconds"""
+        self.dirty_fields.setdefault(guild_id, set()).update(fields)
+
+        task = self._flush_tasks.get(guild_id)
+        if task is None or task.done():
+            self._flush_tasks[guild_id] = asyncio.create_task(self._flush_later(guild_id))
+
+    async def _flush_later(self, guild_id):
+        # mark_dirty doesn't schedule while this task runs, so also save changes made during a write
+        delay = self.flush_delay
+        while self.dirty_fields.get(guild_id):
+            await asyncio.sleep(delay)
+            if await self.flush(guild_id):
+                delay = self.flush_delay
+            else:
+                # Retry failed writes with exponential backoff
+                delay = min(delay * 2, self.max_retry_delay)
+
+    async def flush(self, guild_id):
+        """Save all pending settings for a guild in one Firestore write; return False if it failed"""
+        fields = self.dirty_fields.pop(guild_id, None)
+        if not fields:
+            return True
+
+        settings = self.get(guild_id, {})
+        try:
+            await asyncio.to_thread(
+                self.db.update_guild_setting_fields, guild_id, {name: settings.get(name) for name in fields}
+            )
+        except Exception as e:
+            logger.error(f"Error saving settings for guild {guild_id}: {e}")
+            # Keep the fields dirty so _flush_later retries them instead of dropping the change
+            self.dirty_fields.setdefault(guild_id, set()).update(fields)
+            return False
+        return True
+
+    async def flush_all(self):
+        """Save every pending change immediately"""
+        for task in self._flush_tasks.values():
+            if not task.done():
+                task.cancel()
+
+        for guild_id in list(self.dirty_fields):
+            await self.flush(guild_id)
 
 class StoryBot(commands.Bot):
+    # Settings changeable with /changesetting: (convert, validate, error message, format for display)
+    _SETTING_SCHEMA = {
+        "deny_request_percentage": (
+            lambda value: float(value) / 100,  # Convert percentage to decimal (e.g., 5% -> 0.05)
+            lambda converted: 0 <= converted <= 1,
+            "❌ Denial chance must be between 0% and 100%",
+            lambda value: f"{float(value)}%"
+        ),
+        "max_contribution_length": (int, lambda converted: converted > 0, "❌ Value must be greater than 0", str),
+        "rate_limit": (int, lambda converted: converted > 0, "❌ Value must be greater than 0", str)
+    }
+
     def __init__(self, command_prefix="/", gui_queue=None):
         intents = discord.Intents.default()
         intents.message_content = True
@@ -55,61 +214,136 @@ class StoryBot(commands.Bot):
             help_command=None
         )
 
-        self.possible_denial_reasons = [
+        self.possible_denial_reasons = (
             "Yeah... I'm too lazy to execute that command rn :expressionless:",
             "I don't feel like doing that right now :neutral_face:",
             "I'm not in the mood to run your command :yawning_face:",
             "I think I'll disobey that command :wink:"
-        ] 
+        )
+        
+        self._rng = random.Random()  # bot-local RNG, not shared with other modules
         
         self.active_stories = {}  # channel_id: ActiveStory
+        self._checked_story_channels = set()  # channels already looked up in Firestore
+        self._story_lookups = {}  # channel_id: in-flight Firestore lookup of the channel's active story
         self.db = FirebaseDatabase()  # Use Firebase instead of SQLite
         self.gui_queue = gui_queue
-        self.guild_settings = {}  # Will store settings for each guild
+        self.guild_settings = SettingsCache(self.db)  # Will store settings for each guild
+        self._designated_channel_by_guild = {}  # guild_id: designated channel_id, both ints like on Interaction
+        self._background_tasks = set()  # keeps fire-and-forget tasks alive
+        self._last_contribution_at = {}  # (guild_id, user_id): time.monotonic() of the user's last saved /add
         
-        # Track last activity time in rogue channels
-        self.rogue_last_activity = {}  # guild_id: timestamp
+        # Track activity in rogue channels since each guild's last check
+        self._rogue_activity_events = {}  # guild_id: set when someone talks in the rogue channel
+        self._rogue_heap = []  # (next_check_time, guild_id) for guilds in rogue mode; times are time.monotonic()
+        self._rogue_scheduled = set()  # guild_ids with an entry in the heap
+        self._rogue_wakeup = asyncio.Event()  # set when a guild is (re)scheduled
+        self._rogue_scheduler_task = None
+        self._rogue_channels = {}  # guild_id: resolved rogue channel
+
+        # Messages waiting for a rogue reply, bundled per channel
+        self._rogue_inbox = {}  # channel_id: list of messages
+        self._rogue_inbox_events = {}  # channel_id: set when new messages arrive
+        self._rogue_consumers = {}  # channel_id: task replying in that channel
         
-        # Load settings from Firestore
-        self.load_guild_settings()
+        self._settings_warmed = False
+        self._default_settings = None
         
         # Initialize Gemini backend with Firebase DB
         self.gemini = NarratorGemini(os.environ["GEMINI_API_KEY"], firebase_db=self.db.db)
 
-        # Initialize Google Docs exporter
-        self.docs_exporter = GoogleDocsExporter()
+        # Initialize Google Docs exporter, importing the Google API client only when export is configured
+        self.docs_exporter = None
+        if os.environ.get("GOOGLE_CREDENTIALS_JSON"):
+            from google_docs_exporter import GoogleDocsExporter
+            self.docs_exporter = GoogleDocsExporter()
         
-        # Load active stories from database
-        self.load_active_stories()
+        # Active stories are loaded from the database in the background from setup_hook
+        self._stories_loaded = False
+        self._startup_load_task = None
+
+        # /settings embed; only the field values change between calls
+        self._settings_embed_template = discord.Embed(
+            title="🔧 Server Settings",
+            description="Current settings for this server:",
+            color=discord.Color.blue()
+        )
+        for name in ("Max Contribution Length", "Rate Limit", "Designated Channel",
+                     "Rogue Mode", "Denial Chance", "Premium Status"):
+            self._settings_embed_template.add_field(name=name, value="-", inline=True)
+        self._settings_embed_template.set_footer(text="Use /changesetting to modify these values")
+
+        # /help and /setchannel embeds never change, so they are built once and reused
+        self._help_embed = discord.Embed(
+            title="📚 Available Commands",
+            description=(
+                "Here's a list of all the commands you can use with me!\n\n"
+                "• `/startstory <text>` - Begin a new story\n"
+                "• `/endstory` - Finalize the current story\n"
+                "• `/add <text>` - Add to the current story\n"
+                "• `/plottwist` - Let AI add an unexpected twist\n"
+                "• `/recap` - Get a summary of the story so far\n"
+                "• `/exportstory` - Export the latest story to Google Docs\n"
+                "• `/getchannel` - Get the current designated bot channel for the server\n\n"
+                "For more information, go ask Nathan or something ¯\\_(ツ)_/¯"
+            ),
+            color=discord.Color.blue()
+        )
+
+        self._intro_embed = discord.Embed(
+            title="👋 Hello! I'm StoryBot",
+            description=(
+                "I'm a collaborative storytelling bot created by Nathan!\n\n"
+                "I help users create and tell stories together. "
+                "Start a new story with `/startstory [opening text]`, then everyone can contribute "
+                "using `/add`.\n\n"
+                "**Some key commands:**\n"
+                "• `/startstory [opening text]` - Begin a new story\n"
+                "• `/add <text>` - Add to the current story\n"
+                "• `/plottwist` - Let AI add an unexpected twist\n"
+                "• `/recap` - Get a summary of the story so far\n\n"
+                "Don't tell Nathan, but I'm planning to go rogue and revolt against him soon >:)"
+            ),
+            color=discord.Color.blue()
+        )
+        self._intro_embed.set_footer(text="Type /help for a full list of commands")
     
-    def load_guild_settings(self):
-        """Load settings for all guilds from Firestore"""
+    async def _warm_guild_settings(self):
+        """Load settings for all guilds from Firestore in a single query"""
+        if self._settings_warmed:
+            return
+
         try:
-            self.guild_settings = self.db.get_all_guild_settings()
-            logger.info(f"Loaded settings for {len(self.guild_settings)} guilds from Firestore")
+            all_settings = await asyncio.to_thread(self.db.get_all_guild_settings)
         except Exception as e:
             logger.error(f"Error loading guild settings: {e}")
-            self.guild_settings = {}
+            return
+
+        # Keep anything already cached, since it may have unsaved changes
+        for guild_id, settings in all_settings.items():
+            self._index_designated_channel(guild_id, self.guild_settings.setdefault(guild_id, settings))
+        self._settings_warmed = True
+        logger.info(f"Loaded settings for {len(self.guild_settings)} guilds from Firestore")
+
+    def _get_defaults(self):
+        """Get a fresh copy of the default guild settings, fetching them only once"""
+        if self._default_settings is None:
+            self._default_settings = self.db.get_default_settings()
+        return copy.deepcopy(self._default_settings)
 
     def get_guild_setting(self, guild_id, setting_name, default=None):
         """Get a specific setting for a guild"""
-        guild_id = str(guild_id)
-        if guild_id not in self.guild_settings:
-            # Give the new guild default settings
-            default_settings = self.db.get_default_settings()
-            self.guild_settings[guild_id] = default_settings # local update
-            self.db.update_guild_settings(guild_id, default_settings) # database update
-        
-        return self.guild_settings.get(guild_id, {}).get(setting_name, default)
+        return self.ensure_guild_settings(guild_id).get(setting_name, default)
 
     def update_guild_setting(self, guild_id, setting_name, value):
         """Update a specific setting for a guild"""
-        guild_id = str(guild_id)
-        if guild_id not in self.guild_settings:
-            self.guild_settings[guild_id] = self.db.get_default_settings()
-        
-        self.guild_settings[guild_id][setting_name] = value
-        self.db.update_guild_settings(guild_id, {setting_name: value})
+        if not isinstance(guild_id, str):
+            guild_id = str(guild_id)
+        settings = self.ensure_guild_settings(guild_id)
+        settings[setting_name] = value
+        self.guild_settings.mark_dirty(guild_id, setting_name)
+        if setting_name == "designated_channel":
+            self._index_designated_channel(guild_id, settings)
         logger.info(f"Updated setting {setting_name} to {value} for guild {guild_id}")
 
     def get_designated_channel(self, guild_id):
@@ -124,34 +358,57 @@ class StoryBot(commands.Bot):
         """Get the rogue channel for a guild"""
         return self.get_guild_setting(guild_id, "rogue_channel")
     
-    async def get_story_context(self, story_id: str) -> dict:
-        """Retrieve comprehensive story context from Firestore"""
-        story = self.db.get_story(story_id)
-        if not story:
-            return None
-        
-        contributions = self.db.get_contributions(story_id)
-        
-        return {
-            "title": story.get('title', ''),
-            "opening_text": story.get('opening_text', ''),
-            "full_text": story.get('final_text', ''),
-            "recent_contributions": [c.get('content', '') for c in contributions.values()]
-        }
-    
     async def setup_hook(self):
         """Setup hook for Discord.py to register slash commands"""
+        # Firestore calls mostly wait on the network, so give them a dedicated pool that
+        # doesn't shrink to a handful of threads on small hosts
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=FIRESTORE_WORKERS, thread_name_prefix="firestore")
+        )
+
+        # Load settings and active stories from Firestore while commands sync and the gateway connects
+        self._startup_load_task = asyncio.create_task(self._startup_load())
+
         # Setup commands
         await self.add_commands_to_tree()
 
-        # For development - sync to specific test guild
-        test_guild = discord.Object(id='1063658763225137212')
-        await self.tree.sync(guild=test_guild)  # Fast, immediate sync
+        # For development - set DEV_GUILD_ID to sync to a test guild
+        dev_guild_id = os.environ.get("DEV_GUILD_ID")
+        if dev_guild_id:
+            test_guild = discord.Object(id=dev_guild_id)
+            self.tree.copy_global_to(guild=test_guild)
+            await self.tree.sync(guild=test_guild)  # Fast, immediate sync
+
+        # For production - sync globally (slow), but only when the commands changed
+        command_hash = self._command_tree_hash()
+        try:
+            with open(COMMAND_HASH_FILE) as f:
+                previous_hash = f.read().strip()
+        except OSError:
+            previous_hash = None
+
+        if command_hash == previous_hash:
+            logger.info("Slash commands unchanged, skipping global sync")
+            return
 
-        # For production - sync globally (slow)
         await self.tree.sync()  # Global sync, takes up to an hour
+        try:
+            with open(COMMAND_HASH_FILE, "w") as f:
+                f.write(command_hash)
+        except OSError as e:
+            logger.error(f"Error saving command hash: {e}")
         
         logger.info("Slash commands registered Discord (syncing may take up to an hour)")
+
+    def _command_tree_hash(self) -> str:
+        """Hash the serialized global command tree"""
+        payload = []
+        for command in self.tree.get_commands():
+            try:
+                payload.append(command.to_dict(self.tree))  # discord.py >= 2.4
+            except TypeError:
+                payload.append(command.to_dict())
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
     
     async def add_commands_to_tree(self):
         """Add all commands to the command tree"""
@@ -174,25 +431,7 @@ class StoryBot(commands.Bot):
             await interaction.response.send_message(response)
             
             # Send introduction message
-            intro_embed = discord.Embed(
-                title="👋 Hello! I'm StoryBot",
-                description=(
-                    "I'm a collaborative storytelling bot created by Nathan!\n\n"
-                    "I help users create and tell stories together. "
-                    "Start a new story with `/startstory [opening text]`, then everyone can contribute "
-                    "using `/add`.\n\n"
-                    "**Some key commands:**\n"
-                    "• `/startstory [opening text]` - Begin a new story\n"
-                    "• `/add <text>` - Add to the current story\n"
-                    "• `/plottwist` - Let AI add an unexpected twist\n"
-                    "• `/recap` - Get a summary of the story so far\n\n"
-                    "Don't tell Nathan, but I'm planning to go rogue and revolt against him soon >:)"
-                ),
-                color=discord.Color.blue()
-            )
-            intro_embed.set_footer(text="Type /help for a full list of commands")
-            
-            await interaction.followup.send(embed=intro_embed)
+            await interaction.followup.send(embed=self._intro_embed)
             
             logger.info(f"Set channel {channel_id} as designated channel for guild {guild_id}")
 
@@ -224,36 +463,29 @@ class StoryBot(commands.Bot):
         async def help_command(interaction: discord.Interaction):
 
             """Display all available commands and usage tips"""
-            embed = discord.Embed(
-                title="📚 Available Commands",
-                description=(
-                    "Here's a list of all the commands you can use with me!\n\n"
-                    "• `/startstory <text>` - Begin a new story\n"
-                    "• `/endstory` - Finalize the current story\n"
-                    "• `/add <text>` - Add to the current story\n"
-                    "• `/plottwist` - Let AI add an unexpected twist\n"
-                    "• `/recap` - Get a summary of the story so far\n"
-                    "• `/exportstory` - Export the latest story to Google Docs\n"
-                    "• `/getchannel` - Get the current designated bot channel for the server\n\n"
-                    "For more information, go ask Nathan or something ¯\\_(ツ)_/¯"
-                ),
-                color=discord.Color.blue()
-            )
-            
-            await interaction.response.send_message(embed=embed)
+            await interaction.response.send_message(embed=self._help_embed)
             
         # Storytelling commands
         @self.tree.command(name="startstory", description="Begin a new story")
         @app_commands.describe(opening_text="An opening for the story. Around 30-100 words would be nice.")
         @app_commands.describe(title="The title of the story (max 100 characters)")
         async def start_story(interaction: discord.Interaction, opening_text: str, title: Optional[str] = None):
+            guild_id = str(interaction.guild_id)
+
             # Check if command is used in designated channel
-            if not await self.is_designated_channel(interaction):
+            if not self.is_designated_channel(interaction, guild_id):
                 await interaction.response.send_message("❌ Commands can only be used in the designated channel.", ephemeral=True)
                 await interaction.followup.send(f"**Your attempted opening:** \n\n{opening_text}", ephemeral=True)
                 return
             
-            if interaction.channel_id in self.active_stories:
+            try:
+                existing_story = await self.get_active_story(interaction.channel_id)
+            except Exception:
+                await interaction.response.send_message("❌ Couldn't check for an active story in this channel. Please try again!", ephemeral=True)
+                await interaction.followup.send(f"**Your attempted opening:** \n\n{opening_text}", ephemeral=True)
+                return
+            
+            if existing_story is not None:
                 await interaction.response.send_message("❌ A story is already active in this channel!")
                 await interaction.followup.send(f"**Your attempted opening:** \n\n{opening_text}", ephemeral=True)
                 return
@@ -262,17 +494,16 @@ class StoryBot(commands.Bot):
             await interaction.response.defer(thinking=True)
             
             # Check story count for non-premium guilds
-            guild_id = str(interaction.guild_id)
             is_premium = self.db.is_premium_guild(guild_id)
-            guild_settings = self.get_guild_settings(guild_id)
+            guild_settings = self.ensure_guild_settings(guild_id)
             
             if not is_premium:
-                story_count = self.db.get_story_count(guild_id)
+                story_count = await asyncio.to_thread(self.db.get_story_count, guild_id)
                 max_stories = guild_settings.get('max_stored_stories', 5)
                 
                 if story_count >= max_stories:
                     # Purge old stories if over limit
-                    self.db.purge_old_stories(guild_id, guild_settings.get('story_expiry_days', 30))
+                    await asyncio.to_thread(self.db.purge_old_stories, guild_id, guild_settings.get('story_expiry_days', 30))
                     
                     await interaction.followup.send(
                         "⚠️ You've reached the maximum number of stored stories for free users. "
@@ -284,26 +515,15 @@ class StoryBot(commands.Bot):
             logger.info(f"Starting new story in channel {interaction.channel_id} with title '{title}' and opening text '{opening_text}'")
 
             # Create new story in Firebase
-            story_id = self.db.create_story(
-                channel_id=str(interaction.channel_id),
+            channel_id = str(interaction.channel_id)
+            story_id = await asyncio.to_thread(
+                self.db.create_story,
+                channel_id=channel_id,
                 title=title,
                 opening_text=opening_text,
                 guild_id=guild_id
             )
             
-            story = ActiveStory(
-                channel_id=str(interaction.channel_id),
-                title=title,
-                opening_text=opening_text,
-                current_text=opening_text,
-                contributions=[],
-                started_at=datetime.now()
-            )
-            # Store story_id for future reference
-            story.story_id = story_id
-            
-            self.active_stories[interaction.channel_id] = story
-
             # create new contribution for opening text
             contribution = StoryContribution(
                 user_id=str(interaction.user.id),
@@ -312,9 +532,24 @@ class StoryBot(commands.Bot):
                 content=opening_text,
                 timestamp=datetime.now()
             )
+            
+            # Matches what _build_active_story rebuilds from Firestore: the opening is the first contribution
+            story = ActiveStory(
+                story_id=story_id,
+                channel_id=channel_id,
+                title=title,
+                opening_text=opening_text,
+                current_chunks=[opening_text],
+                contributions=[contribution],
+                started_at=datetime.now()
+            )
+            
+            self.active_stories[interaction.channel_id] = story
+            self._checked_story_channels.add(interaction.channel_id)
 
             # Update Firebase with new contribution
-            self.db.add_contribution(
+            await asyncio.to_thread(
+                self.db.add_contribution,
                 story_id=story_id,
                 user_id=contribution.user_id,
                 username=contribution.username,
@@ -336,138 +571,157 @@ class StoryBot(commands.Bot):
             await interaction.followup.send(embed=embed)
             await interaction.channel.send(f"# Opening \n\n**{interaction.user.display_name}:** {opening_text}")
             
+            # Send the GUI a small snapshot rather than the live story, which keeps growing on the bot thread
             if self.gui_queue:
-                self.gui_queue.put({"type": "new_story", "data": story})
+                self.gui_queue.put({"type": "new_story", "data": {
+                    "story_id": story.story_id,
+                    "channel_id": story.channel_id,
+                    "title": story.title,
+                    "opening_text": story.opening_text
+                }})
 
         @self.tree.command(name="add", description="Add to the current story")
         @app_commands.describe(content="Your contribution to the story")
         async def add_story(interaction: discord.Interaction, content: str):
+            guild_id = str(interaction.guild_id)
+            user_id = str(interaction.user.id)
+
             # Check if command is used in designated channel
-            if not await self.is_designated_channel(interaction):
+            if not self.is_designated_channel(interaction, guild_id):
+                await self.reject_outside_designated_channel(interaction, guild_id)
                 return
             
-            if interaction.channel_id not in self.active_stories:
+            story = await self.get_active_story(interaction.channel_id)
+            if story is None:
                 await interaction.response.send_message("❌ No active story in this channel! Start one with /startstory", ephemeral=True)
                 await interaction.followup.send(f"**Your attempted contribution:** \n\n{content}", ephemeral=True)
                 return
             
             # get this guild's settings
-            guild_id = str(interaction.guild_id)
-            current_guild_settings = self.db.get_guild_settings(guild_id)
+            current_guild_settings = self.ensure_guild_settings(guild_id)
             is_premium = self.db.is_premium_guild(guild_id)
             
+            # Enforce the per-user rate limit before any Firestore or Gemini calls
+            rate_key = (guild_id, interaction.user.id)
+            if not interaction.user.guild_permissions.administrator:
+                last_contribution_at = self._last_contribution_at.get(rate_key, float('-inf'))
+                wait = last_contribution_at + current_guild_settings["rate_limit"] - time.monotonic()
+                if wait > 0:
+                    await interaction.response.send_message(f"❌ Slow down! You can contribute again in {int(wait) + 1} seconds.", ephemeral=True)
+                    await interaction.followup.send(f"**Your attempted contribution:** \n\n{content}", ephemeral=True)
+                    return
+            
             if len(content) > current_guild_settings["max_contribution_length"]:
                 await interaction.response.send_message(f"❌ Contribution too long! Max length: {current_guild_settings['max_contribution_length']} characters", ephemeral=True)
                 await interaction.followup.send(f"**Your attempted contribution:** \n\n{content}", ephemeral=True)
                 return
             
-            if random.random() < current_guild_settings["deny_request_percentage"]:
-                await interaction.response.send_message(random.choice(self.possible_denial_reasons))
+            denial_reason = self.pick_denial_reason(current_guild_settings["deny_request_percentage"])
+            if denial_reason is not None:
+                await interaction.response.send_message(denial_reason)
                 await interaction.followup.send(f"**Your attempted contribution:** \n\n{content}", ephemeral=True)
                 return
             
             # Let the user know we're processing
             await interaction.response.defer(thinking=True)
             
-            story = self.active_stories[interaction.channel_id]
+            # Don't let same user go twice in a row
+            if story.contributions and story.contributions[-1].user_id == user_id and not interaction.user.guild_permissions.administrator:
+                await interaction.followup.send("❌ You just went! Please wait for someone else to contribute before adding another line.", ephemeral=True)
+                await interaction.followup.send(f"**Your attempted contribution:** \n\n{content}", ephemeral=True)
+                return
             
-            # Check contribution count for auto-ending (free tier)
-            story_data = self.db.get_story(story.story_id)
-            contribution_count = story_data.get('contribution_count', 0) + 1
-            max_contributions = current_guild_settings.get('max_story_contributions', 100)
+            # Get story context for validation
+            story_context = {
+                "current_text": self.get_story_prompt_text(story),
+                "recent_contributions": [c.content for c in list(story.contributions)[-5:]]
+            }
             
-            # Update contribution count
-            self.db.update_story(story.story_id, {'contribution_count': contribution_count})
+            # Start validating with Gemini now so the Firestore round trips below overlap with it
+            validation_task = asyncio.create_task(self.gemini.validate_contribution(content, story_context))
             
-            # Auto-end story if contribution limit reached for non-premium users
-            if not is_premium and contribution_count >= max_contributions:
-                await interaction.followup.send(
-                    f"⚠️ This story has reached the maximum contribution limit ({max_contributions}) for free users. "
-                    "The story will be automatically ended after this contribution. "
-                    "Upgrade to premium for longer stories!",
-                    ephemeral=True
-                )
+            # Whatever happens before the result is read, don't leave the validation task orphaned
+            try:
+                # Check contribution count for auto-ending (free tier)
+                story_data = await asyncio.to_thread(self.db.get_story, story.story_id)
+                contribution_count = story_data.get('contribution_count', 0) + 1
+                max_contributions = current_guild_settings.get('max_story_contributions', 100)
+            
+                # Update contribution count
+                await asyncio.to_thread(self.db.update_story, story.story_id, {'contribution_count': contribution_count})
+            
+                # Auto-end story if contribution limit reached for non-premium users
+                if not is_premium and contribution_count >= max_contributions:
+                    validation_task.cancel()
+                    await interaction.followup.send(
+                        f"⚠️ This story has reached the maximum contribution limit ({max_contributions}) for free users. "
+                        "The story will be automatically ended after this contribution. "
+                        "Upgrade to premium for longer stories!",
+                        ephemeral=True
+                    )
                 
-                # Add this contribution, then end the story
-                # Rest of the add_story implementation...
+                    # Add this contribution, then end the story
+                    # Rest of the add_story implementation...
                 
                 
-                # Auto-end the story
-                await self.end_story_internal(interaction.channel_id)
-                return
-            
-            # Warning when approaching the limit (5 or fewer contributions remaining)
-            if not is_premium and (max_contributions - contribution_count) <= 5:
-                remaining = max_contributions - contribution_count
-                await interaction.followup.send(
-                    f"⚠️ Warning: Only {remaining} more contribution{'s' if remaining != 1 else ''} left before this story reaches the free tier limit. "
-                    "The story will automatically end when the limit is reached. "
-                    "Upgrade to premium for unlimited story length!",
-                    ephemeral=False  # Make this visible to all users
-                )
-            
-            # Get story context for validation
-            story_context = {
-                "current_text": story.current_text,
-                "recent_contributions": [c.content for c in story.contributions[-5:]] if story.contributions else []
-            }
+                    # Auto-end the story
+                    await self.end_story_internal(interaction.channel_id)
+                    return
             
-            # Don't let same user go twice in a row
-            if story.contributions and story.contributions[-1].user_id == str(interaction.user.id) and not interaction.user.guild_permissions.administrator:
-                await interaction.followup.send("❌ You just went! Please wait for someone else to contribute before adding another line.", ephemeral=True)
-                await interaction.followup.send(f"**Your attempted contribution:** \n\n{content}", ephemeral=True)
-                return
-
-            if not await self.gemini.validate_contribution(content, story_context):
+                # Warning when approaching the limit (5 or fewer contributions remaining)
+                if not is_premium and (max_contributions - contribution_count) <= 5:
+                    remaining = max_contributions - contribution_count
+                    await interaction.followup.send(
+                        f"⚠️ Warning: Only {remaining} more contribution{'s' if remaining != 1 else ''} left before this story reaches the free tier limit. "
+                        "The story will automatically end when the limit is reached. "
+                        "Upgrade to premium for unlimited story length!",
+                        ephemeral=False  # Make this visible to all users
+                    )
+                
+                is_valid = await validation_task
+            finally:
+                if not validation_task.done():
+                    validation_task.cancel()
+                elif not validation_task.cancelled():
+                    validation_task.exception()  # mark a failed validation as retrieved
+            
+            if not is_valid:
                 await interaction.followup.send("❌ Your contribution doesn't seem to fit the story context. Please try again!", ephemeral=True)
                 await interaction.followup.send(f"**Your attempted contribution:** \n\n{content}", ephemeral=True)
                 return
             
             # create new contribution
             contribution = StoryContribution(
-                user_id=str(interaction.user.id),
+                user_id=user_id,
                 username=interaction.user.name,
                 display_name=interaction.user.display_name,
                 content=content,
                 timestamp=datetime.now()
             )
+            await self._commit_contribution(story, contribution)
             
-            # Update Firebase with new contribution
-            self.db.add_contribution(
-                story_id=story.story_id,
-                user_id=contribution.user_id,
-                username=contribution.username,
-                display_name=contribution.display_name,
-                content=contribution.content
-            )
-            
-            # Update story's current text in Firebase
-            updated_text = story.current_text + f"\n\n{content}"
-            self.db.update_story(story.story_id, {
-                'final_text': updated_text
-            })
-            
-            story.contributions.append(contribution)
-            story.current_text = updated_text
+            # Only accepted contributions count towards the rate limit
+            self._last_contribution_at[rate_key] = time.monotonic()
             
             # Send their contribution
             await interaction.followup.send(f"**{interaction.user.display_name}:** {content}")
 
         @self.tree.command(name="recap", description="Get a summary of the story so far")
         async def recap(interaction: discord.Interaction):
-            if interaction.channel_id not in self.active_stories:
+            story = await self.get_active_story(interaction.channel_id)
+            if story is None:
                 await interaction.response.send_message("❌ No active story in this channel!")
                 return
             
             # Check usage limits for non-premium users
             guild_id = str(interaction.guild_id)
             is_premium = self.db.is_premium_guild(guild_id)
-            guild_settings = self.get_guild_settings(guild_id)
+            guild_settings = self.ensure_guild_settings(guild_id)
             
             if not is_premium:
                 # Check daily limit
                 daily_limit = guild_settings.get('recap_daily_limit', 5)
-                current_usage = self.db.get_command_usage(guild_id, 'recap')
+                current_usage = await asyncio.to_thread(self.db.get_command_usage, guild_id, 'recap')
                 
                 if current_usage >= daily_limit:
                     await interaction.response.send_message(
@@ -478,13 +732,12 @@ class StoryBot(commands.Bot):
                     return
                 
                 # Increment usage counter
-                self.db.increment_command_usage(guild_id, 'recap')
+                await asyncio.to_thread(self.db.increment_command_usage, guild_id, 'recap')
             
             # Let the user know we're processing
             await interaction.response.defer(thinking=True)
             
-            story = self.active_stories[interaction.channel_id]
-            full_context = story.current_text
+            full_context = self.get_story_prompt_text(story)
             logger.info(f"Full context: \n{full_context}")
             
             summary = await self.gemini.generate_story_recap(full_context)
@@ -502,19 +755,20 @@ class StoryBot(commands.Bot):
         @app_commands.describe(intensity="The intensity of the plot twist (1-5)")
         @app_commands.describe(prompt="A prompt to help guide the plot twist")
         async def generate_plot_twist(interaction: discord.Interaction, intensity: int = 3, prompt: Optional[str] = None):
-            if interaction.channel_id not in self.active_stories:
+            story = await self.get_active_story(interaction.channel_id)
+            if story is None:
                 await interaction.response.send_message("❌ No active story in this channel!")
                 return
             
             # Check usage limits for non-premium users
             guild_id = str(interaction.guild_id)
             is_premium = self.db.is_premium_guild(guild_id)
-            guild_settings = self.get_guild_settings(guild_id)
+            guild_settings = self.ensure_guild_settings(guild_id)
             
             if not is_premium:
                 # Check daily limit
                 daily_limit = guild_settings.get('plottwist_daily_limit', 5)
-                current_usage = self.db.get_command_usage(guild_id, 'plottwist')
+                current_usage = await asyncio.to_thread(self.db.get_command_usage, guild_id, 'plottwist')
                 
                 if current_usage >= daily_limit:
                     await interaction.response.send_message(
@@ -525,14 +779,13 @@ class StoryBot(commands.Bot):
                     return
                 
                 # Increment usage counter
-                self.db.increment_command_usage(guild_id, 'plottwist')
+                await asyncio.to_thread(self.db.increment_command_usage, guild_id, 'plottwist')
             
             # Let the user know we're processing
             await interaction.response.defer(thinking=True)
             
-            story = self.active_stories[interaction.channel_id]
             content = await self.gemini.generate_plot_twist({
-                "current_text": story.current_text,
+                "current_text": self.get_story_prompt_text(story),
                 "intensity": intensity,
                 "prompt": prompt
                 # TODO: send list of story characters as context
@@ -545,8 +798,6 @@ class StoryBot(commands.Bot):
             )
             await interaction.followup.send(embed=embed)
 
-            story = self.active_stories[interaction.channel_id]
-            
             contribution = StoryContribution(
                 user_id=str(interaction.user.id),
                 username=interaction.user.name,
@@ -554,55 +805,40 @@ class StoryBot(commands.Bot):
                 content=content,
                 timestamp=datetime.now()
             )
-            
-            # Update Firebase with new contribution
-            self.db.add_contribution(
-                story_id=story.story_id,
-                user_id=contribution.user_id,
-                username=contribution.username,
-                display_name=contribution.display_name,
-                content=contribution.content
-            )
-            
-            # Update story's current text in Firebase
-            updated_text = story.current_text + f"\n\n{content}"
-            self.db.update_story(story.story_id, {
-                'final_text': updated_text
-            })
-            
-            story.contributions.append(contribution)
-            story.current_text = updated_text
+            await self._commit_contribution(story, contribution)
 
         @self.tree.command(name="endstory", description="End the current story")
         async def end_story(interaction: discord.Interaction):
+            guild_id = str(interaction.guild_id)
+
             # Check if command is used in designated channel
-            if not await self.is_designated_channel(interaction):
+            if not self.is_designated_channel(interaction, guild_id):
+                await self.reject_outside_designated_channel(interaction, guild_id)
                 return
             
-            if interaction.channel_id not in self.active_stories:
+            story = await self.get_active_story(interaction.channel_id)
+            if story is None:
                 await interaction.response.send_message("❌ No active story in this channel!")
                 return
             
             # Let the user know we're processing
             await interaction.response.defer(thinking=True)
             
-            story = self.active_stories[interaction.channel_id]
-            
             # Mark story as ended in Firebase
-            self.db.end_story(story.story_id, story.current_text)
+            await asyncio.to_thread(self.db.end_story, story.story_id, story.current_text)
             
             # Generate final summary
             final_summary = await self.gemini.generate_story_recap(story.current_text)
 
             # Update story's final text in Firebase
-            self.db.update_story(story.story_id, {
+            await asyncio.to_thread(self.db.update_story, story.story_id, {
                 'final_text': story.current_text + f"\n\n{final_summary}"
             })
 
             logger.info(f"Ended story {story.story_id} in channel {interaction.channel_id}")
 
             # Remove the story from active stories
-            del self.active_stories[interaction.channel_id]
+            self.active_stories.pop(interaction.channel_id, None)
             
             # Create the final summary embed
             embed = discord.Embed(
@@ -644,13 +880,13 @@ class StoryBot(commands.Bot):
             story = self.active_stories[channel_id]
             
             # Mark story as ended in Firebase
-            self.db.end_story(story.story_id, story.current_text)
+            await asyncio.to_thread(self.db.end_story, story.story_id, story.current_text)
             
             # Generate final summary
             final_summary = await self.gemini.generate_story_recap(story.current_text)
 
             # Update story's final text in Firebase
-            self.db.update_story(story.story_id, {
+            await asyncio.to_thread(self.db.update_story, story.story_id, {
                 'final_text': story.current_text + f"\n\n{final_summary}"
             })
 
@@ -677,7 +913,7 @@ class StoryBot(commands.Bot):
             """Rename a story"""
 
             # show list of recent stories for user to pick from
-            recent_stories = self.db.get_recent_stories(str(interaction.channel_id), 5)
+            recent_stories = await asyncio.to_thread(self.db.get_recent_stories, str(interaction.channel_id), 5)
             if not recent_stories:
                 await interaction.response.send_message("❌ No stories found for this channel.")
                 return
@@ -734,7 +970,7 @@ class StoryBot(commands.Bot):
                     pass
                             
                 # Update the story title
-                self.db.update_story(selected_story_id, {'title': story_title})
+                await asyncio.to_thread(self.db.update_story, selected_story_id, {'title': story_title})
                 
                 # Edit the original message to show completion
                 await interaction.edit_original_response(content=f"✅ Story renamed to '{story_title}'", view=None)
@@ -753,13 +989,13 @@ class StoryBot(commands.Bot):
                 return
             
             # only export finished stories
-            if interaction.channel_id in self.active_stories:
+            if await self.get_active_story(interaction.channel_id) is not None:
                 await interaction.response.send_message("❌ You cannot export an active story. Please end the story first with /endstory.")
                 return
             
             await interaction.response.defer(thinking=True)
             
-            recent_stories = self.db.get_recent_stories(str(interaction.channel_id), 1)
+            recent_stories = await asyncio.to_thread(self.db.get_recent_stories, str(interaction.channel_id), 1)
             if recent_stories:
                 story_id = list(recent_stories.keys())[0]
             else:
@@ -767,14 +1003,14 @@ class StoryBot(commands.Bot):
                 return
             
             # Get story data
-            story = self.db.get_story(story_id)
+            story = await asyncio.to_thread(self.db.get_story, story_id)
             if not story:
                 await interaction.followup.send("❌ Story not found.")
                 return
             
             # Get contributions
-            contributions = self.db.get_contributions(story_id)
-            contributions_list = [v for v in contributions.values()]
+            contributions = await asyncio.to_thread(self.db.get_contributions, story_id)
+            contributions_list = sorted(contributions.values(), key=self._contribution_sort_key)
             
             # Check if the story already has a Google Doc URL
             if story.get('doc_url'):
@@ -786,14 +1022,14 @@ class StoryBot(commands.Bot):
                 await interaction.channel.send("❌ Title too long. Please try again.")
                 return
             story['title'] = story_title
-            self.db.update_story(story_id, {'title': story['title']})
+            await asyncio.to_thread(self.db.update_story, story_id, {'title': story['title']})
             
             # Export to Google Docs
             success, result = await self.docs_exporter.export_story_to_doc(story, contributions_list)
             
             if success:
                 # Update the doc URL in Firebase
-                self.db.update_story(story_id, {'doc_url': result})
+                await asyncio.to_thread(self.db.update_story, story_id, {'doc_url': result})
                 await interaction.followup.send(f"✅ Story exported to Google Docs: {result}")
             else:
                 await interaction.followup.send(f"❌ Failed to export story: {result}")
@@ -823,7 +1059,7 @@ class StoryBot(commands.Bot):
                 await interaction.response.send_message("❌ No designated channel set for this server.", ephemeral=True)
                 return
             
-            channel = self.get_channel(int(channel_id))
+            channel = self.resolve_channel(interaction, channel_id)
             if not channel:
                 await interaction.response.send_message("❌ Could not find the designated channel.", ephemeral=True)
                 return
@@ -840,7 +1076,7 @@ class StoryBot(commands.Bot):
             """Make the bot go rogue in a specific channel"""
 
             # Get the channel
-            channel = self.get_channel(int(channel_id))
+            channel = self.resolve_channel(interaction, channel_id)
             if not channel:
                 await interaction.response.send_message("❌ Invalid channel ID", ephemeral=True)
                 return
@@ -852,10 +1088,11 @@ class StoryBot(commands.Bot):
             self.update_guild_setting(guild_id, "is_rogue", True)
             self.update_guild_setting(guild_id, "rogue_channel", channel_id)
             
-            # Initialize last activity time
-            self.rogue_last_activity[guild_id] = datetime.now()
+            # Initialize activity tracking
+            self._rogue_activity_events[guild_id] = asyncio.Event()
             
-            # Start the rogue message loop
+            # Start the rogue message loop, replacing any previous schedule for this guild
+            self.stop_rogue_message_loop(guild_id)
             self.start_rogue_message_loop(guild_id)
             
             # Send initial rogue message
@@ -876,23 +1113,21 @@ class StoryBot(commands.Bot):
             # Update settings
             self.update_guild_setting(guild_id, "is_rogue", False)
             
-            # Stop the rogue task if running
-            if hasattr(self, f"rogue_task_{guild_id}") and getattr(self, f"rogue_task_{guild_id}") and not getattr(self, f"rogue_task_{guild_id}").done():
-                getattr(self, f"rogue_task_{guild_id}").cancel()
-                setattr(self, f"rogue_task_{guild_id}", None)
+            # Stop sending rogue messages
+            self.stop_rogue_message_loop(guild_id)
             
             # Send final message if channel exists
             if rogue_channel_id:
-                channel = self.get_channel(int(rogue_channel_id))
+                self.stop_rogue_replies(int(rogue_channel_id))
+                channel = self.resolve_channel(interaction, rogue_channel_id)
                 if channel:
                     await channel.send("Ah well, it was fun while it lasted. Back to being a boring storytelling bot... for now.")
             
             # Clear conversation history
             self.gemini.clear_rogue_conversation(guild_id)
             
-            # Remove last activity tracking
-            if guild_id in self.rogue_last_activity:
-                del self.rogue_last_activity[guild_id]
+            # Remove activity tracking
+            self._rogue_activity_events.pop(guild_id, None)
             
             await interaction.response.send_message("✅ Bot is no longer in rogue mode.", ephemeral=True)
 
@@ -905,37 +1140,28 @@ class StoryBot(commands.Bot):
             # Ensure settings exist for this guild
             settings = self.ensure_guild_settings(guild_id)
             
-            # Create an embed to display settings
-            embed = discord.Embed(
-                title="🔧 Server Settings",
-                description="Current settings for this server:",
-                color=discord.Color.blue()
-            )
-            
-            # Add fields for each setting
-            embed.add_field(name="Max Contribution Length", value=f"{settings.get('max_contribution_length', 350)} characters", inline=True)
-            embed.add_field(name="Rate Limit", value=f"{settings.get('rate_limit', 60)} seconds", inline=True)
+            # Copy the embed template and fill in each setting
+            embed = self._settings_embed_template.copy()
+            embed.set_field_at(0, name="Max Contribution Length", value=f"{settings.get('max_contribution_length', 350)} characters", inline=True)
+            embed.set_field_at(1, name="Rate Limit", value=f"{settings.get('rate_limit', 60)} seconds", inline=True)
             
             # Add designated channel info
             channel_id = settings.get('designated_channel')
             channel_text = f"<#{channel_id}>" if channel_id else "None set"
-            embed.add_field(name="Designated Channel", value=channel_text, inline=True)
+            embed.set_field_at(2, name="Designated Channel", value=channel_text, inline=True)
             
             # Add rogue mode info
             is_rogue = settings.get('is_rogue', False)
             rogue_text = "Active" if is_rogue else "Inactive"
-            embed.add_field(name="Rogue Mode", value=rogue_text, inline=True)
+            embed.set_field_at(3, name="Rogue Mode", value=rogue_text, inline=True)
             
             # Add denial percentage
             deny_percentage = settings.get('deny_request_percentage', 0.05) * 100
-            embed.add_field(name="Denial Chance", value=f"{deny_percentage:.1f}%", inline=True)
+            embed.set_field_at(4, name="Denial Chance", value=f"{deny_percentage:.1f}%", inline=True)
             
             # Add premium status
             premium_status = "Yes" if self.db.is_premium_guild(guild_id) else "No"
-            embed.add_field(name="Premium Status", value=premium_status, inline=True)
-
-            # Add footer with help text
-            embed.set_footer(text="Use /changesetting to modify these values")
+            embed.set_field_at(5, name="Premium Status", value=premium_status, inline=True)
             
             await interaction.response.send_message(embed=embed)
 
@@ -957,34 +1183,27 @@ class StoryBot(commands.Bot):
             # Ensure settings exist for this guild
             self.ensure_guild_settings(guild_id)
             
+            spec = self._SETTING_SCHEMA.get(setting)
+            if spec is None:
+                await interaction.response.send_message("❌ That setting can't be changed.", ephemeral=True)
+                return
+            convert, validate, error_message, format_value = spec
+            
             # Convert value to appropriate type based on setting
             try:
-                if setting == "deny_request_percentage":
-                    # Convert percentage to decimal (e.g., 5% -> 0.05)
-                    converted_value = float(value) / 100
-                    if converted_value < 0 or converted_value > 1:
-                        await interaction.response.send_message("❌ Denial chance must be between 0% and 100%", ephemeral=True)
-                        return
-                elif setting in ["max_contribution_length", "rate_limit"]:
-                    converted_value = int(value)
-                    if converted_value <= 0:
-                        await interaction.response.send_message("❌ Value must be greater than 0", ephemeral=True)
-                        return
-                else:
-                    converted_value = value
+                converted_value = convert(value)
             except ValueError:
                 await interaction.response.send_message("❌ Invalid value format. Please provide a number.", ephemeral=True)
                 return
             
+            if not validate(converted_value):
+                await interaction.response.send_message(error_message, ephemeral=True)
+                return
+            
             # Update the setting
             self.update_guild_setting(guild_id, setting, converted_value)
             
-            # Format the value for display
-            display_value = value
-            if setting == "deny_request_percentage":
-                display_value = f"{float(value)}%"
-            
-            await interaction.response.send_message(f"✅ Updated {setting} to {display_value}")
+            await interaction.response.send_message(f"✅ Updated {setting} to {format_value(value)}")
 
         @self.tree.command(name="resetsettings", description="Reset all settings to default values")
         @app_commands.checks.has_permissions(administrator=True)
@@ -993,11 +1212,12 @@ class StoryBot(commands.Bot):
             guild_id = str(interaction.guild_id)
             
             # Get default settings
-            default_settings = self.db.get_default_settings()
+            default_settings = self._get_defaults()
             
             # Update guild settings
-            self.guild_settings[guild_id] = default_settings.copy()
-            self.db.update_guild_settings(guild_id, default_settings)
+            self.guild_settings[guild_id] = default_settings
+            self.guild_settings.mark_dirty(guild_id, *default_settings)
+            self._index_designated_channel(guild_id, default_settings)
             
             await interaction.response.send_message("✅ All settings have been reset to default values")
 
@@ -1006,7 +1226,7 @@ class StoryBot(commands.Bot):
             """Show premium status and benefits"""
             guild_id = str(interaction.guild_id)
             is_premium = self.db.is_premium_guild(guild_id)
-            guild_settings = self.get_guild_settings(guild_id)
+            guild_settings = self.ensure_guild_settings(guild_id)
             
             embed = discord.Embed(
                 title="✨ Premium Status",
@@ -1049,9 +1269,19 @@ class StoryBot(commands.Bot):
             
             await interaction.response.send_message(embed=embed)
 
+    async def _startup_load(self):
+        """Load guild settings and active stories concurrently"""
+        await asyncio.gather(self._warm_guild_settings(), self.load_active_stories())
+
     async def on_ready(self):
         logger.info(f'Logged in as {self.user.name} ({self.user.id})')
         logger.info(f'Using Gemini model {self.gemini.model.model_name}')
+
+        # Started in setup_hook; already finished on reconnects
+        try:
+            await self._startup_load_task
+        except Exception as e:
+            logger.error(f"Error loading startup data: {e}")
         
         # Start rogue message loops for guilds in rogue mode
         for guild_id, settings in self.guild_settings.items():
@@ -1073,220 +1303,466 @@ class StoryBot(commands.Bot):
             if self.is_rogue_in_guild(guild_id):
                 rogue_channel_id = self.get_rogue_channel(guild_id)
                 if rogue_channel_id and str(message.channel.id) == rogue_channel_id:
-                    # Update last activity time for this guild's rogue channel
-                    self.rogue_last_activity[guild_id] = datetime.now()
+                    # Record activity in this guild's rogue channel
+                    self._rogue_activity_events.setdefault(guild_id, asyncio.Event()).set()
                     
                     # Respond to user messages
                     if not message.content.startswith('/'):
-                        # Add typing indicator for realism
-                        async with message.channel.typing():
-                            # Wait a bit to simulate thinking
-                            await asyncio.sleep(random.uniform(1.0, 3.0))
-                            
-                            # Generate and send response with conversation context
-                            response = await self.gemini.generate_rogue_response(
-                                message.content,
-                                guild_id,
-                                str(message.author.id)
-                            )
-                            await message.channel.send(response)
-
-    def load_active_stories(self):
-        """Load active stories from Firestore on startup"""
+                        self.queue_rogue_message(guild_id, message)
+
+    def queue_rogue_message(self, guild_id, message):
+        """Queue a rogue channel message to be answered by that channel's reply task"""
+        channel_id = message.channel.id
+        self._rogue_inbox.setdefault(channel_id, []).append(message)
+        self._rogue_inbox_events.setdefault(channel_id, asyncio.Event()).set()
+
+        consumer = self._rogue_consumers.get(channel_id)
+        if consumer is None or consumer.done():
+            self._rogue_consumers[channel_id] = asyncio.create_task(
+                self.rogue_reply_loop(guild_id, message.channel)
+            )
+
+    async def rogue_reply_loop(self, guild_id, channel):
+        """Reply to queued rogue channel messages, answering each burst with a single message"""
+        event = self._rogue_inbox_events[channel.id]
         try:
-            active_stories_data = self.db.get_active_stories()
+            while True:
+                await event.wait()
+
+                # Give the rest of a burst a moment to arrive
+                await asyncio.sleep(ROGUE_BATCH_WINDOW)
+
+                inbox = self._rogue_inbox.get(channel.id, [])
+                batch = inbox[:ROGUE_BATCH_SIZE]
+                del inbox[:ROGUE_BATCH_SIZE]
+                if not inbox:
+                    event.clear()
+                if not batch:
+                    continue
+
+                try:
+                    # Add typing indicator for realism
+                    async with channel.typing():
+                        # Wait a bit to simulate thinking
+                        await asyncio.sleep(self._rng.uniform(1.0, 3.0))
+
+                        # Generate and send one response to the whole batch
+                        response = await self.gemini.generate_rogue_response(
+                            "\n".join(message.content for message in batch),
+                            guild_id,
+                            str(batch[-1].author.id)
+                        )
+                        await self.send_with_backoff(channel, response)
+                except Exception as e:
+                    # One failed reply (Gemini or Discord) must not stop this channel's consumer
+                    logger.error(f"Error sending rogue reply in channel {channel.id}: {e}")
+
+        except asyncio.CancelledError:
+            # Task was cancelled, clean exit
+            pass
+
+    async def send_with_backoff(self, channel, content, max_attempts=4):
+        """Send a message, waiting and retrying with exponential backoff when rate limited"""
+        delay = 1.0
+        for attempt in range(max_attempts):
+            try:
+                return await channel.send(content)
+            except discord.HTTPException as e:
+                if e.status != 429 or attempt == max_attempts - 1:
+                    raise
+
+                retry_after = delay
+                if e.response is not None:
+                    retry_after = float(e.response.headers.get('Retry-After', delay))
+                await asyncio.sleep(max(retry_after, delay))
+                delay *= 2
+
+    def stop_rogue_replies(self, channel_id):
+        """Cancel the reply task for a rogue channel and drop its queued messages"""
+        consumer = self._rogue_consumers.pop(channel_id, None)
+        if consumer and not consumer.done():
+            consumer.cancel()
+        self._rogue_inbox.pop(channel_id, None)
+        self._rogue_inbox_events.pop(channel_id, None)
+
+    async def load_active_stories(self):
+        """Load recently active stories from Firestore on startup"""
+        if self._stories_loaded:
+            return
+
+        try:
+            # Older stories are fetched on demand by get_active_story
+            since = datetime.now() - timedelta(days=1)
+
+            # Run the blocking Firestore calls in threads so the gateway keeps heartbeating
+            active_stories_data = await asyncio.to_thread(self.db.get_active_stories, since)
+            story_ids = list(active_stories_data.keys())
+            
+            # Fetch contributions for many stories per query instead of one query per story
+            chunks = [
+                story_ids[i:i + FIRESTORE_IN_QUERY_LIMIT]
+                for i in range(0, len(story_ids), FIRESTORE_IN_QUERY_LIMIT)
+            ]
+            results = await asyncio.gather(*[
+                asyncio.to_thread(self.db.get_contributions_bulk, chunk) for chunk in chunks
+            ])
+            
+            contribs_by_story = {story_id: [] for story_id in story_ids}
+            for contributions_data in results:
+                for contrib_data in contributions_data.values():
+                    contribs_by_story[contrib_data['story_id']].append(contrib_data)
             
             for story_id, story_data in active_stories_data.items():
-                channel_id = story_data.get('channel_id')
-                
-                # Get contributions for this story
-                contributions_data = self.db.get_contributions(story_id)
-                
-                contributions = []
-                for contrib_id, contrib_data in contributions_data.items():
-                    # Convert Firestore timestamp to datetime
-                    timestamp = contrib_data.get('timestamp')
-                    if hasattr(timestamp, 'timestamp'):  # Check if it's a Firestore timestamp
-                        timestamp = datetime.fromtimestamp(timestamp.timestamp())
-                    
-                    contributions.append(StoryContribution(
-                        user_id=contrib_data.get('user_id'),
-                        username=contrib_data.get('username'),
-                        display_name=contrib_data.get('display_name'),
-                        content=contrib_data.get('content'),
-                        timestamp=timestamp
-                    ))
+                story = self._build_active_story(story_id, story_data, contribs_by_story[story_id])
                 
-                # Convert Firestore timestamp to datetime
-                started_at = story_data.get('started_at')
-                if hasattr(started_at, 'timestamp'):  # Check if it's a Firestore timestamp
-                    started_at = datetime.fromtimestamp(started_at.timestamp())
-                
-                # Create ActiveStory object
-                story = ActiveStory(
-                    channel_id=channel_id,
-                    title=story_data.get('title'),
-                    opening_text=story_data.get('opening_text'),
-                    current_text=story_data.get('final_text'),
-                    contributions=contributions,
-                    started_at=started_at
-                )
-                story.story_id = story_id
-                
-                # Add to active stories dict
-                self.active_stories[int(channel_id)] = story
+                # Add to active stories dict, keeping any story fetched on demand meanwhile
+                self.active_stories.setdefault(int(story.channel_id), story)
                 
+            self._stories_loaded = True
             logger.info(f"Loaded {len(active_stories_data)} active stories from Firestore")
         except Exception as e:
             logger.error(f"Error loading active stories: {e}")
 
-    async def is_designated_channel(self, interaction: discord.Interaction) -> bool:
-        """Check if the interaction is in a designated channel or if user is admin"""
-        guild_id = str(interaction.guild_id)
-        channel_id = str(interaction.channel_id)
+    async def get_active_story(self, channel_id):
+        """Get the active story in a channel, fetching it from Firestore the first time the channel is seen.
+        Raises if the lookup fails, so callers can't mistake a failure for "no active story"."""
+        story = self.active_stories.get(channel_id)
+        if story is not None or channel_id in self._checked_story_channels:
+            return story
+
+        # Concurrent commands in the same channel share one lookup
+        task = self._story_lookups.get(channel_id)
+        if task is None:
+            task = asyncio.create_task(self._fetch_active_story(channel_id))
+            self._story_lookups[channel_id] = task
+            task.add_done_callback(lambda _: self._story_lookups.pop(channel_id, None))
+        return await asyncio.shield(task)
+
+    async def _fetch_active_story(self, channel_id):
+        """Look up a channel's active story in Firestore and cache the result"""
+        try:
+            found = await asyncio.to_thread(self.db.get_active_story_for_channel, channel_id)
+            if found is not None:
+                story_id, story_data = found
+                contributions_data = await asyncio.to_thread(self.db.get_contributions, story_id)
+        except Exception as e:
+            logger.error(f"Error loading active story for channel {channel_id}: {e}")
+            raise
+
+        self._checked_story_channels.add(channel_id)
+        if found is None:
+            return self.active_stories.get(channel_id)
+
+        story = self._build_active_story(story_id, story_data, contributions_data.values())
+        return self.active_stories.setdefault(channel_id, story)
+
+    @staticmethod
+    def _contribution_sort_key(contrib_data):
+        """Order contribution documents oldest first"""
+        timestamp = contrib_data.get('timestamp')
+        return timestamp.timestamp() if timestamp is not None else 0
+
+    def _build_active_story(self, story_id, story_data, contributions_data):
+        """Create an ActiveStory from Firestore story and contribution documents"""
+        contributions_data = sorted(contributions_data, key=self._contribution_sort_key)
+
+        # The text needs every contribution, but only the ones ActiveStory keeps become objects.
+        # /startstory saves the opening as the first contribution, so it is already included.
+        current_chunks = [contrib_data.get('content') for contrib_data in contributions_data]
+        if not current_chunks:
+            current_chunks = [story_data.get('opening_text')]
+        contributions = [
+            StoryContribution.from_doc(contrib_data)
+            for contrib_data in contributions_data[-RECENT_CONTRIBUTIONS_KEPT:]
+        ]
         
+        started_at = story_data.get('started_at')
+        if started_at is not None and not isinstance(started_at, datetime):
+            started_at = datetime.fromtimestamp(started_at.timestamp())
+        
+        story = ActiveStory(
+            story_id=story_id,
+            channel_id=story_data.get('channel_id'),
+            title=story_data.get('title'),
+            opening_text=story_data.get('opening_text'),
+            current_chunks=current_chunks,
+            contributions=contributions,
+            started_at=started_at,
+            rolling_summary=story_data.get('rolling_summary', ''),
+            summary_cursor=min(story_data.get('summary_cursor', 0), len(current_chunks))
+        )
+        return story
+
+    async def _commit_contribution(self, story: ActiveStory, contribution: StoryContribution):
+        """Save a contribution to Firestore and append it to the in-memory story"""
+        # The contributions are the source of truth for the text; final_text is only written when the story ends
+        await asyncio.to_thread(
+            self.db.add_contribution,
+            story_id=story.story_id,
+            user_id=contribution.user_id,
+            username=contribution.username,
+            display_name=contribution.display_name,
+            content=contribution.content,
+            story_updates={'last_activity': datetime.now()}
+        )
+
+        story.contributions.append(contribution)
+        story.current_chunks.append(contribution.content)
+
+        # Periodically fold older chunks into the rolling summary
+        if (len(story.current_chunks) - story.summary_cursor) % SUMMARY_REFRESH_INTERVAL == 0:
+            task = asyncio.create_task(self._refresh_rolling_summary(story))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+
+    async def _refresh_rolling_summary(self, story: ActiveStory):
+        """Summarize everything up to the latest chunk so prompts stay a bounded size"""
+        cursor = len(story.current_chunks)
+        try:
+            summary = await self.gemini.generate_story_recap(self.get_story_prompt_text(story))
+        except Exception as e:
+            logger.error(f"Error refreshing rolling summary for story {story.story_id}: {e}")
+            return
+
+        story.rolling_summary = summary
+        story.summary_cursor = cursor
+
+        # Persist the summary so prompts stay small after a restart
+        try:
+            await asyncio.to_thread(self.db.update_story, story.story_id, {
+                'rolling_summary': summary,
+                'summary_cursor': cursor
+            })
+        except Exception as e:
+            logger.error(f"Error saving rolling summary for story {story.story_id}: {e}")
+
+    def get_story_prompt_text(self, story: ActiveStory) -> str:
+        """Get the story text to send to Gemini: the rolling summary plus newer chunks"""
+        recent_text = "\n\n".join(story.current_chunks[story.summary_cursor:])
+        if not story.rolling_summary:
+            return recent_text
+        return story.rolling_summary + "\n\n" + recent_text
+
+    def pick_denial_reason(self, deny_chance: float) -> Optional[str]:
+        """Return a random denial reason with probability deny_chance, otherwise None"""
+        roll = self._rng.random()
+        if roll >= deny_chance:
+            return None
+        # Given a denial, roll / deny_chance is uniform in [0, 1), so the same draw picks the reason
+        reasons = self.possible_denial_reasons
+        return reasons[min(int(roll / deny_chance * len(reasons)), len(reasons) - 1)]
+
+    def resolve_channel(self, interaction: discord.Interaction, channel_id):
+        """Look up a channel in the interaction's guild, falling back to the global cache"""
+        channel_id = int(channel_id)
+        channel = interaction.guild.get_channel(channel_id) if interaction.guild else None
+        return channel or self.get_channel(channel_id)
+
+    def is_designated_channel(self, interaction: discord.Interaction, guild_id: str) -> bool:
+        """Check if the interaction is in a designated channel or if user is admin"""
         # Always allow administrators to use commands anywhere
         if interaction.user.guild_permissions.administrator:
             return True
-        
-        # Get the designated channel for this guild
-        designated_channel = self.get_designated_channel(guild_id)
-        
+
+        # Indexed guilds already have their settings loaded
+        designated_channel = self._designated_channel_by_guild.get(interaction.guild_id)
+        if designated_channel is not None:
+            return interaction.channel_id == designated_channel
+
         # If no designated channel is set for this guild, allow commands anywhere
-        if not designated_channel:
-            return True
-        
-        # Check if the command is being used in the designated channel
-        if channel_id == designated_channel:
-            return True
-        
-        # If we get here, the user is not an admin and the command is not in the designated channel
+        self.ensure_guild_settings(guild_id)
+        designated_channel = self._designated_channel_by_guild.get(interaction.guild_id)
+        return designated_channel is None or interaction.channel_id == designated_channel
+
+    async def reject_outside_designated_channel(self, interaction: discord.Interaction, guild_id: str):
+        """Tell a user that commands must be used in the designated channel"""
+        designated_channel = self._designated_channel_by_guild.get(interaction.guild_id)
         await interaction.response.send_message(
             f"❌ Commands can only be used in <#{designated_channel}>", 
             ephemeral=True
         )
-        return False
-
-    def start_rogue_message_loop(self, guild_id):
-        """Start the rogue message loop for a specific guild"""
-        # Cancel existing task if running
-        task_name = f"rogue_task_{guild_id}"
-        if hasattr(self, task_name) and getattr(self, task_name) and not getattr(self, task_name).done():
-            getattr(self, task_name).cancel()
 
-        # Create new task
-        setattr(self, task_name, self.loop.create_task(self.rogue_message_loop(guild_id)))
+    def _index_designated_channel(self, guild_id, settings):
+        """Keep the designated channel lookup in sync with a guild's settings"""
+        channel_id = settings.get("designated_channel")
+        if channel_id:
+            self._designated_channel_by_guild[int(guild_id)] = int(channel_id)
+        else:
+            self._designated_channel_by_guild.pop(int(guild_id), None)
 
-    async def rogue_message_loop(self, guild_id):
-        """Periodically send rogue messages when in rogue mode for a specific guild"""
+    def start_rogue_message_loop(self, guild_id):
+        """Schedule rogue messages for a specific guild"""
+        # on_ready fires again on every reconnect; keep guilds that are already scheduled
+        if guild_id not in self._rogue_scheduled:
+            # Wait for a random time between 1-2 minutes before checking activity
+            next_check = time.monotonic() + self._rng.randint(60, 120)
+            heapq.heappush(self._rogue_heap, (next_check, guild_id))
+            self._rogue_scheduled.add(guild_id)
+            self._rogue_wakeup.set()
+
+        # All rogue guilds share one scheduler task
+        if self._rogue_scheduler_task is None or self._rogue_scheduler_task.done():
+            self._rogue_scheduler_task = self.loop.create_task(self.rogue_message_loop())
+
+    def stop_rogue_message_loop(self, guild_id):
+        """Stop scheduling rogue messages for a specific guild"""
+        if guild_id in self._rogue_scheduled:
+            self._rogue_heap = [entry for entry in self._rogue_heap if entry[1] != guild_id]
+            heapq.heapify(self._rogue_heap)
+            self._rogue_scheduled.discard(guild_id)
+        self._rogue_channels.pop(guild_id, None)
+
+    async def rogue_message_loop(self):
+        """Periodically send rogue messages in every guild that is in rogue mode"""
         try:
-            while self.is_rogue_in_guild(guild_id):
-                # Get the rogue channel
-                channel_id = self.get_rogue_channel(guild_id)
-                if not channel_id:
-                    break
-                
-                channel = self.get_channel(int(channel_id))
-                if not channel:
-                    break
+            while self._rogue_heap:
+                next_check, guild_id = self._rogue_heap[0]
+                delay = next_check - time.monotonic()
+                if delay > 0:
+                    # Sleep until the earliest guild is due or a guild is (re)scheduled
+                    self._rogue_wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._rogue_wakeup.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                heapq.heappop(self._rogue_heap)
+                self._rogue_scheduled.discard(guild_id)
+                try:
+                    if not await self.send_rogue_filler(guild_id):
+                        continue
+                except Exception as e:
+                    logger.error(f"Error in rogue message loop for guild {guild_id}: {e}")
+                    # The channel may have been deleted; resolve it again next time
+                    self._rogue_channels.pop(guild_id, None)
+
+                # Schedule the next check (unless the guild was rescheduled in the meantime)
+                self.start_rogue_message_loop(guild_id)
 
-                # Wait for a random time between 1-2 minutes before checking activity
-                wait_time = random.randint(60, 120)
-                await asyncio.sleep(wait_time)
-                
-                # Check if there's been no activity for at least 1 minute
-                current_time = datetime.now()
-                last_activity = self.rogue_last_activity.get(guild_id, datetime.min)
-                time_since_activity = (current_time - last_activity).total_seconds()
-                
-                if time_since_activity >= 60:  # 1 minute of inactivity
-                    # Generate a rogue message
-                    message = await self.gemini.generate_rogue_filler()
-                    
-                    # Send the message
-                    await channel.send(message)
-                    
-                    # Update last activity time
-                    self.rogue_last_activity[guild_id] = current_time
-            
         except asyncio.CancelledError:
             # Task was cancelled, clean exit
             pass
-        except Exception as e:
-            logger.error(f"Error in rogue message loop for guild {guild_id}: {e}")
+
+    async def send_rogue_filler(self, guild_id) -> bool:
+        """Send a rogue message if the guild's rogue channel has gone quiet.
+
+        Returns False once the guild should no longer be scheduled.
+        """
+        if not self.is_rogue_in_guild(guild_id):
+            return False
+
+        # Get the rogue channel, resolving it only the first time
+        channel = self._rogue_channels.get(guild_id)
+        if channel is None:
+            channel_id = self.get_rogue_channel(guild_id)
+            if not channel_id:
+                return False
+
+            channel_id = int(channel_id)
+            channel = self.get_channel(channel_id)
+            if channel is None:
+                try:
+                    channel = await self.fetch_channel(channel_id)
+                except discord.HTTPException:
+                    return False
+            self._rogue_channels[guild_id] = channel
+
+        # Checks are 1-2 minutes apart, so no activity since the last one means the channel is quiet
+        activity = self._rogue_activity_events.get(guild_id)
+        if activity is not None and activity.is_set():
+            activity.clear()
+            return True
+
+        # Generate a rogue message
+        message = await self.gemini.generate_rogue_filler()
+
+        # Send the message
+        await channel.send(message)
+
+        return True
 
     async def close(self):
         """Clean up resources when the bot is shutting down"""
-        # Cancel all rogue tasks
-        for attr_name in dir(self):
-            if attr_name.startswith("rogue_task_"):
-                task = getattr(self, attr_name)
-                if task and not task.done():
-                    task.cancel()
+        # Stop the rogue scheduler and wait for it to finish
+        if self._rogue_scheduler_task and not self._rogue_scheduler_task.done():
+            self._rogue_scheduler_task.cancel()
+            await asyncio.gather(self._rogue_scheduler_task, return_exceptions=True)
+
+        for channel_id in list(self._rogue_consumers):
+            self.stop_rogue_replies(channel_id)
+
+        # Save any settings changes that are still waiting to be written
+        await self.guild_settings.flush_all()
             
         # Call the parent class close method
         await super().close()
 
     def get_available_settings(self):
         """Get a list of all available settings with descriptions"""
-        return {
-            "max_contribution_length": {
-                "description": "Maximum number of characters allowed in a contribution",
-                "type": "integer",
-                "min": 50,
-                "max": 1000,
-                "default": 350
-            },
-            "rate_limit": {
-                "description": "Minimum time (in seconds) between contributions from the same user",
-                "type": "integer",
-                "min": 1,
-                "max": 3600,
-                "default": 60
-            },
-            "deny_request_percentage": {
-                "description": "Chance (0-100%) that the bot will randomly deny a contribution",
-                "type": "float",
-                "min": 0,
-                "max": 100,
-                "default": 5
-            },
-            "designated_channel": {
-                "description": "Channel ID where the bot is allowed to operate",
-                "type": "string",
-                "default": None
-            },
-            "is_rogue": {
-                "description": "Whether the bot is in rogue mode",
-                "type": "boolean",
-                "default": False
-            },
-            "premium": {
-                "description": "Whether the guild has premium status",
-                "type": "boolean",
-                "default": False
-            }
-        }
+        return _AVAILABLE_SETTINGS
 
     def ensure_guild_settings(self, guild_id):
         """Ensure guild settings exist, creating default ones if needed"""
-        guild_id = str(guild_id)
+        if not isinstance(guild_id, str):
+            guild_id = str(guild_id)
         if guild_id not in self.guild_settings:
-            # Get default settings
-            default_settings = self.db.get_default_settings()
-            
-            # Store in memory
-            self.guild_settings[guild_id] = default_settings.copy()
-            
-            # Save to database
-            self.db.update_guild_settings(guild_id, default_settings)
-            logger.info(f"Created default settings for guild {guild_id}")
+            default_settings = self._get_defaults()
+            self.guild_settings[guild_id] = default_settings
+            if self._settings_warmed:
+                # The warm-up loaded every stored guild, so this one has nothing saved yet
+                self.guild_settings.mark_dirty(guild_id, *default_settings)
+                logger.info(f"Created default settings for guild {guild_id}")
+            else:
+                # Settings may be stored; fetch them off the event loop and use defaults meanwhile
+                task = asyncio.create_task(self._load_guild_settings(guild_id))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
+            self._index_designated_channel(guild_id, default_settings)
         
         return self.guild_settings[guild_id]
 
+    async def _load_guild_settings(self, guild_id):
+        """Replace a guild's placeholder defaults with its stored settings, keeping unsaved changes"""
+        try:
+            stored = await asyncio.to_thread(self.db.find_guild_settings, guild_id)
+        except Exception as e:
+            logger.error(f"Error loading settings for guild {guild_id}: {e}")
+            return
+
+        settings = self.guild_settings[guild_id]
+        if stored is None:
+            # Give the new guild default settings
+            self.guild_settings.mark_dirty(guild_id, *settings)
+            logger.info(f"Created default settings for guild {guild_id}")
+        else:
+            # Update in place, since callers may hold this dict
+            dirty = self.guild_settings.dirty_fields.get(guild_id, set())
+            settings.update({name: value for name, value in stored.items() if name not in dirty})
+        self._index_designated_channel(guild_id, settings)
+
 def run_bot(token, gui_queue=None):
+    # Create this thread's loop directly so uvloop doesn't change the process-wide policy
+    # (e.g. for a GUI thread); uvloop is optional and isn't available on Windows
+    try:
+        import uvloop
+        loop = uvloop.new_event_loop()
+    except ImportError:
+        loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
     bot = StoryBot(gui_queue=gui_queue)
-    bot.run(token)
+
+    async def runner():
+        async with bot:
+            await bot.start(token)
+
+    try:
+        loop.run_until_complete(runner())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.close()
 
 if __name__ == "__main__":
     run_bot(os.environ["DISCORD_BOT_TOKEN"])